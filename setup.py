@@ -30,6 +30,9 @@ setup(
     packages=find_packages(exclude=["tests", "tests.*"]),
     package_data={"vedro_git_changed": ["py.typed"]},
     install_requires=find_required(),
+    extras_require={
+        "pygit2": ['pygit2>=1.14,<2.0; python_version >= "3.9"'],
+    },
     tests_require=find_dev_required(),
     classifiers=[
         "License :: OSI Approved :: Apache Software License",
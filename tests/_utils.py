@@ -21,7 +21,7 @@ from vedro.events import (
 
 from vedro_git_changed import GitRepo, VedroGitChanged, VedroGitChangedPlugin
 
-__all__ = ("local_storage_", "git_repo_", "git_changed_plugin", "dispatcher",
+__all__ = ("local_storage_", "git_repo_", "git_repo_factory_", "git_changed_plugin", "dispatcher",
            "fire_arg_parsed_event", "fire_startup_event", "fire_cleanup_event",
            "fire_config_loaded_event", "make_scenarios_path", "make_vscenario", "project_dir")
 
@@ -33,17 +33,23 @@ def local_storage_() -> Mock:
 
 @pytest.fixture()
 def git_repo_() -> Mock:
-    return Mock(spec=GitRepo, get_changed_files=Mock(return_value=[]))
+    return Mock(spec=GitRepo,
+                get_commits=Mock(return_value=("f6e5d4", "a1b2c3")),
+                get_changed_files=Mock(return_value=frozenset()))
 
 
 @pytest.fixture()
-def git_changed_plugin(dispatcher: Dispatcher, git_repo_: Mock,
+def git_repo_factory_(git_repo_: Mock) -> Mock:
+    return Mock(return_value=git_repo_)
+
+
+@pytest.fixture()
+def git_changed_plugin(dispatcher: Dispatcher, git_repo_factory_: Mock,
                        local_storage_: LocalStorage) -> VedroGitChangedPlugin:
-    git_repo_factory = Mock(return_value=git_repo_)
     local_storage_factory = Mock(return_value=local_storage_)
 
     plugin = VedroGitChangedPlugin(VedroGitChanged,
-                                   git_repo_factory=git_repo_factory,
+                                   git_repo_factory=git_repo_factory_,
                                    local_storage_factory=local_storage_factory)
     plugin.subscribe(dispatcher)
     return plugin
@@ -54,15 +60,15 @@ def dispatcher() -> Dispatcher:
     return Dispatcher()
 
 
-def make_scenarios_path() -> Path:
-    return Path("scenarios/").absolute()
+def make_scenarios_path(project_dir: Path) -> Path:
+    return project_dir / "scenarios"
 
 
-def make_vscenario(filename: str) -> VirtualScenario:
+def make_vscenario(project_dir: Path, filename: str) -> VirtualScenario:
     class _Scenario(Scenario):
-        __file__ = make_scenarios_path() / filename
+        __file__ = make_scenarios_path(project_dir) / filename
 
-    return VirtualScenario(_Scenario, steps=[])
+    return VirtualScenario(_Scenario, steps=[], project_dir=project_dir)
 
 
 @pytest.fixture()
@@ -78,9 +84,11 @@ async def fire_config_loaded_event(dispatcher: Dispatcher, project_dir_: Path) -
 
 
 async def fire_arg_parsed_event(dispatcher: Dispatcher, project_dir: Path, *,
-                                changed_against_branch: str,
+                                changed_against_branch: Optional[str],
                                 changed_fetch_cache: int = 60,
-                                changed_no_fetch: bool = False):
+                                changed_no_fetch: bool = False,
+                                changed_fetch_mode: str = "minimal",
+                                changed_backend: str = "auto"):
     await fire_config_loaded_event(dispatcher, project_dir)
 
     arg_parser = ArgumentParser()
@@ -88,7 +96,9 @@ async def fire_arg_parsed_event(dispatcher: Dispatcher, project_dir: Path, *,
 
     args = Namespace(changed_against_branch=changed_against_branch,
                      changed_fetch_cache=changed_fetch_cache,
-                     changed_no_fetch=changed_no_fetch)
+                     changed_no_fetch=changed_no_fetch,
+                     changed_fetch_mode=changed_fetch_mode,
+                     changed_backend=changed_backend)
     await dispatcher.fire(ArgParsedEvent(args))
 
 
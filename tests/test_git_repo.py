@@ -1,50 +1,121 @@
-import os
+from io import BytesIO
 from pathlib import Path
 from typing import List, Optional, Tuple
-from unittest.mock import Mock, call
+from unittest.mock import Mock, PropertyMock, call
 
 import git
+import pytest
 from baby_steps import given, then, when
+from git.exc import BadName
 from pytest import raises
 
 from vedro_git_changed import GitRepo, GitRepoError
+from vedro_git_changed._git_repo import _create_git_repo, _read_nul_separated
 
 
 def _create_repo_factory(files: Optional[List[str]] = None) -> Tuple[Mock, Mock]:
     mock_ = Mock(spec=git.Repo)
-    mock_.working_dir = "."
-    mock_.git.diff.return_value = os.linesep.join(files or [])
+    mock_.working_dir = "/repo"
+    mock_.commit.return_value.hexsha = "f6e5d4"
+    mock_.head.commit.hexsha = "a1b2c3"
+    mock_.git.merge_base.return_value = "b1c2d3"
+    mock_.git.diff_tree.return_value = Mock(
+        stdout=BytesIO(b"".join(f"{file}\0".encode() for file in (files or [])))
+    )
 
     return Mock(return_value=mock_), mock_
 
 
+def test_create_git_repo_cached(tmp_path: Path):
+    with given:
+        git.Repo.init(tmp_path)
+
+    with when:
+        repo1 = _create_git_repo(tmp_path)
+        repo2 = _create_git_repo(str(tmp_path))
+
+    with then:
+        assert repo1 is repo2
+        assert Path(repo1.working_dir) == tmp_path
+
+
+def test_read_nul_separated():
+    with given:
+        stream = BytesIO("scenarios/a.py\0scenarios/сценарий.py\0scenarios/b.py\0".encode())
+
+    with when:
+        entries = list(_read_nul_separated(stream, chunk_size=4))
+
+    with then:
+        assert entries == [
+            b"scenarios/a.py",
+            "scenarios/сценарий.py".encode(),
+            b"scenarios/b.py",
+        ]
+
+
 def test_fetch():
     with given:
         repo_factory_, repo_ = _create_repo_factory()
-        git_repo = GitRepo(git_repo_factory=repo_factory_)
+        git_repo = GitRepo(Path.cwd(), git_repo_factory=repo_factory_)
+
+        branch_name = "main"
 
     with when:
-        res = git_repo.fetch()
+        res = git_repo.fetch(branch_name)
 
     with then:
         assert res is None
         assert repo_.mock_calls == [
-            call.git.fetch()
+            call.git.fetch("--no-tags", "origin", branch_name)
         ]
         assert repo_factory_.mock_calls == [
             call(Path.cwd())
         ]
 
 
+@pytest.mark.parametrize(("mode", "args"), [
+    ("minimal", ("--no-tags", "origin", "main")),
+    ("partial", ("--no-tags", "--filter=blob:none", "origin", "main")),
+    ("full", ()),
+])
+def test_fetch_mode(mode: str, args: Tuple[str, ...]):
+    with given:
+        repo_factory_, repo_ = _create_repo_factory()
+        git_repo = GitRepo(Path.cwd(), git_repo_factory=repo_factory_)
+
+    with when:
+        git_repo.fetch("main", mode=mode)
+
+    with then:
+        assert repo_.mock_calls == [
+            call.git.fetch(*args)
+        ]
+
+
+def test_fetch_unknown_mode():
+    with given:
+        repo_factory_, repo_ = _create_repo_factory()
+        git_repo = GitRepo(Path.cwd(), git_repo_factory=repo_factory_)
+
+    with when, raises(Exception) as exception:
+        git_repo.fetch("main", mode="shallow")
+
+    with then:
+        assert exception.type is ValueError
+        assert str(exception.value) == "Unknown fetch mode 'shallow'"
+        assert repo_.mock_calls == []
+
+
 def test_fetch_cmd_error():
     with given:
         repo_factory_, repo_ = _create_repo_factory()
-        git_repo = GitRepo(git_repo_factory=repo_factory_)
+        git_repo = GitRepo(Path.cwd(), git_repo_factory=repo_factory_)
 
         repo_.git.fetch.side_effect = git.GitCommandError("fetch")
 
     with when, raises(Exception) as exception:
-        git_repo.fetch()
+        git_repo.fetch("main")
 
     with then:
         assert exception.type is GitRepoError
@@ -58,59 +129,231 @@ def test_fetch_cmd_error():
 def test_fetch_init_error():
     with given:
         repo_factory_, repo_ = _create_repo_factory()
-        git_repo = GitRepo(git_repo_factory=repo_factory_)
+        git_repo = GitRepo(Path.cwd(), git_repo_factory=repo_factory_)
 
         repo_factory_.side_effect = git.InvalidGitRepositoryError("error")
 
     with when, raises(Exception) as exception:
-        git_repo.fetch()
+        git_repo.fetch("main")
 
     with then:
         assert exception.type is GitRepoError
         assert str(exception.value) == (
-            "Unable to find a git repository in the current or any parent directories. "
+            f"Unable to find a git repository in '{Path.cwd()}' or any parent directories. "
             "Ensure you are in a directory that is part of a valid git repository."
         )
 
 
+def test_get_commits():
+    with given:
+        repo_factory_, repo_ = _create_repo_factory()
+        git_repo = GitRepo(Path.cwd(), git_repo_factory=repo_factory_)
+
+    with when:
+        commits = git_repo.get_commits("main")
+
+    with then:
+        assert commits == ("f6e5d4", "a1b2c3")
+        assert repo_.mock_calls == [
+            call.commit("origin/main")
+        ]
+
+
+def test_get_commits_head_moved():
+    with given:
+        repo_factory_, repo_ = _create_repo_factory()
+        git_repo = GitRepo(Path.cwd(), git_repo_factory=repo_factory_)
+
+        git_repo.get_commits("main")
+        repo_.head.commit.hexsha = "d4e5f6"
+
+    with when:
+        commits = git_repo.get_commits("main")
+
+    with then:
+        assert commits == ("f6e5d4", "d4e5f6")
+
+
+def test_get_commits_head_error():
+    with given:
+        repo_factory_, repo_ = _create_repo_factory()
+        git_repo = GitRepo(Path.cwd(), git_repo_factory=repo_factory_)
+
+        type(repo_.head).commit = PropertyMock(side_effect=ValueError("unborn"))
+
+    with when, raises(Exception) as exception:
+        git_repo.get_commits("main")
+
+    with then:
+        assert exception.type is GitRepoError
+        assert str(exception.value) == (
+            "Unable to resolve the HEAD commit of the git repository. "
+            "Please ensure that the current branch has at least one commit."
+        )
+
+
+def test_get_commits_branch_error():
+    with given:
+        repo_factory_, repo_ = _create_repo_factory()
+        git_repo = GitRepo(Path.cwd(), git_repo_factory=repo_factory_)
+
+        repo_.commit.side_effect = BadName("origin/main")
+
+    with when, raises(Exception) as exception:
+        git_repo.get_commits("main")
+
+    with then:
+        assert exception.type is GitRepoError
+        assert str(exception.value) == (
+            "Failed to retrieve the file differences from the git repository "
+            "for the branch 'main'. Please ensure that the branch name is correct and exists."
+        )
+
+
 def test_get_changed_files():
     with given:
         files = [
-            ".gitignore",
-            "contexts/registered_user.py",
             "scenarios/login_as_user.py",
             "scenarios/register/register_via_email.py",
         ]
         repo_factory_, repo_ = _create_repo_factory(files=files)
-        git_repo = GitRepo(git_repo_factory=repo_factory_)
+        git_repo = GitRepo(Path.cwd(), git_repo_factory=repo_factory_)
 
         branch_name = "main"
-        target_directory = Path("scenarios/")
+        target_directory = Path("/repo/scenarios/")
 
     with when:
         changed = git_repo.get_changed_files(branch_name, target_directory)
 
     with then:
+        assert isinstance(changed, frozenset)
         assert changed == {
-            Path("scenarios/login_as_user.py"),
-            Path("scenarios/register/register_via_email.py")
+            "/repo/scenarios/login_as_user.py",
+            "/repo/scenarios/register/register_via_email.py",
         }
         assert repo_.mock_calls == [
-            call.git.diff("--name-only", "--diff-filter=ACMTR",
-                          f"origin/{branch_name}...HEAD", "--", ".")
+            call.commit(f"origin/{branch_name}"),
+            call.git.merge_base("f6e5d4", "a1b2c3"),
+            call.git.diff_tree("-r", "-z", "--name-only", "--diff-filter=ACMT", "--no-renames",
+                               "b1c2d3", "a1b2c3", "--", "scenarios", as_process=True),
+            call.git.diff_tree().wait(),
         ]
         assert repo_factory_.mock_calls == [
             call(Path.cwd())
         ]
 
 
+def test_get_changed_files_with_commits():
+    with given:
+        repo_factory_, repo_ = _create_repo_factory(files=["scenarios/login_as_user.py"])
+        git_repo = GitRepo(Path.cwd(), git_repo_factory=repo_factory_)
+
+    with when:
+        changed = git_repo.get_changed_files("main", Path("/repo/scenarios/"),
+                                             commits=("c3d4e5", "d4e5f6"))
+
+    with then:
+        assert changed == {"/repo/scenarios/login_as_user.py"}
+        assert repo_.mock_calls == [
+            call.git.merge_base("c3d4e5", "d4e5f6"),
+            call.git.diff_tree("-r", "-z", "--name-only", "--diff-filter=ACMT", "--no-renames",
+                               "b1c2d3", "d4e5f6", "--", "scenarios", as_process=True),
+            call.git.diff_tree().wait(),
+        ]
+
+
+def test_get_changed_files_after_commit(tmp_path: Path):
+    with given:
+        repo = git.Repo.init(tmp_path)
+        for file in ["scenarios/existing.py", "scenarios/login_as_user.py"]:
+            (tmp_path / file).parent.mkdir(parents=True, exist_ok=True)
+            (tmp_path / file).write_text(file)
+        repo.index.add(["scenarios/existing.py"])
+        repo.index.commit("commit")
+        repo.git.update_ref("refs/remotes/origin/main", "HEAD")
+
+        git_repo = GitRepo(tmp_path)
+        git_repo.get_changed_files("main", tmp_path / "scenarios")
+
+        repo.index.add(["scenarios/login_as_user.py"])
+        repo.index.commit("commit")
+
+    with when:
+        changed = git_repo.get_changed_files("main", tmp_path / "scenarios")
+
+    with then:
+        assert changed == {str(tmp_path / "scenarios/login_as_user.py")}
+
+
+def test_get_changed_files_symlinked_project_dir(tmp_path: Path):
+    with given:
+        repo = git.Repo.init(tmp_path / "real")
+        for file in ["project/scenarios/existing.py", "project/scenarios/login_as_user.py"]:
+            (tmp_path / "real" / file).parent.mkdir(parents=True, exist_ok=True)
+            (tmp_path / "real" / file).write_text(file)
+        repo.index.add(["project/scenarios/existing.py"])
+        repo.index.commit("commit")
+        repo.git.update_ref("refs/remotes/origin/main", "HEAD")
+        repo.index.add(["project/scenarios/login_as_user.py"])
+        repo.index.commit("commit")
+
+        (tmp_path / "link").symlink_to(tmp_path / "real")
+        project_dir = tmp_path / "link" / "project"
+        git_repo = GitRepo(project_dir)
+
+    with when:
+        changed = git_repo.get_changed_files("main", project_dir / "scenarios")
+
+    with then:
+        assert changed == {str(project_dir / "scenarios/login_as_user.py")}
+
+
+def test_get_changed_files_symlink_in_repo(tmp_path: Path):
+    with given:
+        repo = git.Repo.init(tmp_path)
+        for file in ["real/scenarios/existing.py", "real/scenarios/login_as_user.py"]:
+            (tmp_path / file).parent.mkdir(parents=True, exist_ok=True)
+            (tmp_path / file).write_text(file)
+        repo.index.add(["real/scenarios/existing.py"])
+        repo.index.commit("commit")
+        repo.git.update_ref("refs/remotes/origin/main", "HEAD")
+        repo.index.add(["real/scenarios/login_as_user.py"])
+        repo.index.commit("commit")
+
+        (tmp_path / "link").symlink_to(tmp_path / "real")
+        git_repo = GitRepo(tmp_path)
+
+    with when:
+        changed = git_repo.get_changed_files("main", tmp_path / "link" / "scenarios")
+
+    with then:
+        assert changed == {str(tmp_path / "link/scenarios/login_as_user.py")}
+
+
+def test_get_changed_files_working_dir_cached():
+    with given:
+        repo_factory_, repo_ = _create_repo_factory()
+        git_repo = GitRepo(Path.cwd(), git_repo_factory=repo_factory_)
+
+        working_dir_ = PropertyMock(return_value="/repo")
+        type(repo_).working_dir = working_dir_
+
+        git_repo.get_changed_files("main", Path("/another_repo/scenarios/"))
+
+    with when:
+        git_repo.get_changed_files("main", Path("/another_repo/scenarios/"))
+
+    with then:
+        assert working_dir_.mock_calls == [call()]
+
+
 def test_get_changed_files_no_files():
     with given:
         repo_factory_, repo_ = _create_repo_factory(files=[])
-        git_repo = GitRepo(git_repo_factory=repo_factory_)
+        git_repo = GitRepo(Path.cwd(), git_repo_factory=repo_factory_)
 
         branch_name = "main"
-        target_directory = Path("scenarios/")
+        target_directory = Path("/repo/scenarios/")
 
     with when:
         changed = git_repo.get_changed_files(branch_name, target_directory)
@@ -118,8 +361,11 @@ def test_get_changed_files_no_files():
     with then:
         assert changed == set()
         assert repo_.mock_calls == [
-            call.git.diff("--name-only", "--diff-filter=ACMTR",
-                          f"origin/{branch_name}...HEAD", "--", ".")
+            call.commit(f"origin/{branch_name}"),
+            call.git.merge_base("f6e5d4", "a1b2c3"),
+            call.git.diff_tree("-r", "-z", "--name-only", "--diff-filter=ACMT", "--no-renames",
+                               "b1c2d3", "a1b2c3", "--", "scenarios", as_process=True),
+            call.git.diff_tree().wait(),
         ]
         assert repo_factory_.mock_calls == [
             call(Path.cwd())
@@ -129,12 +375,12 @@ def test_get_changed_files_no_files():
 def test_get_changed_files_error():
     with given:
         repo_factory_, repo_ = _create_repo_factory(files=[])
-        git_repo = GitRepo(git_repo_factory=repo_factory_)
+        git_repo = GitRepo(Path.cwd(), git_repo_factory=repo_factory_)
 
-        repo_.git.diff.side_effect = git.GitCommandError("diff")
+        repo_.git.diff_tree.return_value.wait.side_effect = git.GitCommandError("diff-tree")
 
         branch_name = "main"
-        target_directory = Path("scenarios/")
+        target_directory = Path("/repo/scenarios/")
 
     with when, raises(Exception) as exception:
         git_repo.get_changed_files(branch_name, target_directory)
@@ -145,3 +391,36 @@ def test_get_changed_files_error():
             "Failed to retrieve the file differences from the git repository "
             "for the branch 'main'. Please ensure that the branch name is correct and exists."
         )
+
+
+def test_get_changed_files_merge_base_error():
+    with given:
+        repo_factory_, repo_ = _create_repo_factory(files=[])
+        git_repo = GitRepo(Path.cwd(), git_repo_factory=repo_factory_)
+
+        repo_.git.merge_base.side_effect = git.GitCommandError("merge-base")
+
+    with when, raises(Exception) as exception:
+        git_repo.get_changed_files("main", Path("/repo/scenarios/"))
+
+    with then:
+        assert exception.type is GitRepoError
+        assert str(exception.value) == (
+            "Failed to retrieve the file differences from the git repository "
+            "for the branch 'main'. Please ensure that the branch name is correct and exists."
+        )
+
+
+def test_get_changed_files_outside_repo():
+    with given:
+        repo_factory_, repo_ = _create_repo_factory(files=["scenarios/login_as_user.py"])
+        git_repo = GitRepo(Path.cwd(), git_repo_factory=repo_factory_)
+
+        target_directory = Path("/another_repo/scenarios/")
+
+    with when:
+        changed = git_repo.get_changed_files("main", target_directory)
+
+    with then:
+        assert changed == set()
+        assert repo_.mock_calls == []
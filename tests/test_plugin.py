@@ -1,6 +1,7 @@
 from datetime import datetime
 from pathlib import Path
 from time import time
+from typing import Any
 from unittest.mock import Mock, call, patch
 
 import pytest
@@ -9,6 +10,9 @@ from pytest import raises
 from vedro.core import Dispatcher
 from vedro.core import MonotonicScenarioScheduler as ScenarioScheduler
 
+from vedro_git_changed import GitRepo, GitRepoError, Pygit2Repo
+from vedro_git_changed._git_changed_plugin import _create_default_git_repo
+
 from ._utils import (
     dispatcher,
     fire_arg_parsed_event,
@@ -16,16 +20,59 @@ from ._utils import (
     fire_startup_event,
     git_changed_plugin,
     git_repo_,
+    git_repo_factory_,
     local_storage_,
     make_scenarios_path,
     make_vscenario,
     project_dir,
 )
 
-__all__ = ("git_changed_plugin", "dispatcher", "git_repo_",
+__all__ = ("git_changed_plugin", "dispatcher", "git_repo_", "git_repo_factory_",
            "local_storage_", "project_dir",)  # fixtures
 
 
+def test_create_default_git_repo_pygit2(tmp_path: Path):
+    with given:
+        pygit2_ = Mock()
+
+    with when, patch.dict("sys.modules", {"pygit2": pygit2_}):
+        git_repo = _create_default_git_repo(tmp_path)
+
+    with then:
+        assert type(git_repo) is Pygit2Repo
+
+
+def test_create_default_git_repo_no_pygit2(tmp_path: Path):
+    with given:
+        # None in sys.modules makes the import raise ImportError
+        pygit2_ = None
+
+    with when, patch.dict("sys.modules", {"pygit2": pygit2_}):
+        git_repo = _create_default_git_repo(tmp_path)
+
+    with then:
+        assert type(git_repo) is GitRepo
+
+
+def test_create_default_git_repo_git_backend(tmp_path: Path):
+    with given:
+        pygit2_ = Mock()
+
+    with when, patch.dict("sys.modules", {"pygit2": pygit2_}):
+        git_repo = _create_default_git_repo(tmp_path, "git")
+
+    with then:
+        assert type(git_repo) is GitRepo
+
+
+def test_create_default_git_repo_pygit2_backend(tmp_path: Path):
+    with when:
+        git_repo = _create_default_git_repo(tmp_path, "pygit2")
+
+    with then:
+        assert type(git_repo) is Pygit2Repo
+
+
 @pytest.mark.usefixtures(git_changed_plugin.__name__)
 async def test_plugin_arg_parsed_cache_error(*, dispatcher: Dispatcher, project_dir: Path):
     with given:
@@ -67,6 +114,79 @@ async def test_plugin_arg_parsed_no_fetch_and_cache_error(*, dispatcher: Dispatc
         )
 
 
+@pytest.mark.usefixtures(git_changed_plugin.__name__)
+async def test_plugin_arg_parsed_no_fetch_and_mode_error(*, dispatcher: Dispatcher,
+                                                         project_dir: Path):
+    with given:
+        changed_against_branch = "main"
+        changed_fetch_mode = "full"
+        changed_no_fetch = True
+
+    with when, raises(Exception) as exception:
+        await fire_arg_parsed_event(dispatcher, project_dir,
+                                    changed_against_branch=changed_against_branch,
+                                    changed_fetch_mode=changed_fetch_mode,
+                                    changed_no_fetch=changed_no_fetch)
+
+    with then:
+        assert exception.type is ValueError
+        assert str(exception.value) == (
+            "The options '--changed-no-fetch' and '--changed-fetch-mode' "
+            "cannot be used together. Please choose one."
+        )
+
+
+@pytest.mark.usefixtures(git_changed_plugin.__name__)
+async def test_plugin_arg_parsed_backend_error(*, dispatcher: Dispatcher, project_dir: Path):
+    with when, patch.dict("sys.modules", {"pygit2": None}), raises(Exception) as exception:
+        await fire_arg_parsed_event(dispatcher, project_dir,
+                                    changed_against_branch="main", changed_backend="pygit2")
+
+    with then:
+        assert exception.type is ValueError
+        assert str(exception.value) == (
+            "The 'pygit2' backend requires pygit2 to be installed. Please install "
+            "'vedro-git-changed[pygit2]' or choose another '--changed-backend'."
+        )
+
+
+@pytest.mark.usefixtures(git_changed_plugin.__name__)
+async def test_plugin_startup_backend(*, dispatcher: Dispatcher, project_dir: Path,
+                                      git_repo_factory_: Mock):
+    with given:
+        await fire_arg_parsed_event(dispatcher, project_dir,
+                                    changed_against_branch="main", changed_backend="git")
+
+        scheduler = ScenarioScheduler(scenarios=[make_vscenario(project_dir, "scenario1.py")])
+
+    with when:
+        await fire_startup_event(dispatcher, scheduler=scheduler)
+
+    with then:
+        assert git_repo_factory_.mock_calls == [
+            call(project_dir, "git")
+        ]
+
+
+@pytest.mark.usefixtures(git_changed_plugin.__name__)
+async def test_plugin_startup_fetch_mode(*, dispatcher: Dispatcher, project_dir: Path,
+                                         git_repo_: Mock):
+    with given:
+        await fire_arg_parsed_event(dispatcher, project_dir,
+                                    changed_against_branch=(branch_name := "main"),
+                                    changed_fetch_mode="partial")
+
+        scheduler = ScenarioScheduler(scenarios=[make_vscenario(project_dir, "scenario1.py")])
+
+    with when:
+        await fire_startup_event(dispatcher, scheduler=scheduler)
+
+    with then:
+        assert git_repo_.fetch.mock_calls == [
+            call(branch_name, mode="partial")
+        ]
+
+
 @pytest.mark.usefixtures(git_changed_plugin.__name__)
 async def test_plugin_startup_no_changes(*, dispatcher: Dispatcher, project_dir: Path,
                                          git_repo_: Mock, local_storage_: Mock):
@@ -74,7 +194,8 @@ async def test_plugin_startup_no_changes(*, dispatcher: Dispatcher, project_dir:
         await fire_arg_parsed_event(dispatcher, project_dir,
                                     changed_against_branch=(branch_name := "main"))
 
-        scenario1, scenario2 = make_vscenario("scenario1.py"), make_vscenario("scenario2.py")
+        scenario1 = make_vscenario(project_dir, "scenario1.py")
+        scenario2 = make_vscenario(project_dir, "scenario2.py")
         scheduler = ScenarioScheduler(scenarios=[scenario1, scenario2])
 
     with when:
@@ -82,43 +203,102 @@ async def test_plugin_startup_no_changes(*, dispatcher: Dispatcher, project_dir:
 
     with then:
         assert local_storage_.mock_calls == [
-            call.get("last_fetched")
+            call.get("last_fetched"),
+            call.get("changed_files"),
         ]
         assert git_repo_.mock_calls == [
-            call.fetch(),
-            call.get_changed_files(branch_name, make_scenarios_path())
+            call.fetch(branch_name, mode="minimal"),
+            call.get_commits(branch_name),
+            call.get_changed_files(branch_name, make_scenarios_path(project_dir),
+                                   commits=("f6e5d4", "a1b2c3"))
         ]
         assert list(scheduler.scheduled) == []
 
 
+@pytest.mark.usefixtures(git_changed_plugin.__name__)
+async def test_plugin_startup_no_branch(*, dispatcher: Dispatcher, project_dir: Path,
+                                        git_repo_factory_: Mock, local_storage_: Mock):
+    with given:
+        await fire_arg_parsed_event(dispatcher, project_dir, changed_against_branch=None)
+
+        scenario1 = make_vscenario(project_dir, "scenario1.py")
+        scheduler = ScenarioScheduler(scenarios=[scenario1])
+
+    with when:
+        await fire_startup_event(dispatcher, scheduler=scheduler)
+
+    with then:
+        assert git_repo_factory_.mock_calls == []
+        assert local_storage_.mock_calls == []
+        assert list(scheduler.scheduled) == [scenario1]
+
+
 @pytest.mark.usefixtures(git_changed_plugin.__name__)
 async def test_plugin_startup(*, dispatcher: Dispatcher, project_dir: Path,
-                              git_repo_: Mock, local_storage_: Mock):
+                              git_repo_factory_: Mock, git_repo_: Mock, local_storage_: Mock):
     with given:
         await fire_arg_parsed_event(dispatcher, project_dir,
                                     changed_against_branch=(branch_name := "main"))
 
-        scenario1, scenario2 = make_vscenario("scenario1.py"), make_vscenario("scenario2.py")
+        scenario1 = make_vscenario(project_dir, "scenario1.py")
+        scenario2 = make_vscenario(project_dir, "scenario2.py")
         scheduler = ScenarioScheduler(scenarios=[scenario1, scenario2])
 
-        git_repo_.get_changed_files.return_value = [
-            make_scenarios_path() / "scenario1.py"
-        ]
+        git_repo_.get_changed_files.return_value = frozenset({
+            str(make_scenarios_path(project_dir) / "scenario1.py")
+        })
 
     with when:
         await fire_startup_event(dispatcher, scheduler=scheduler)
 
     with then:
+        assert git_repo_factory_.mock_calls == [
+            call(project_dir, "auto")
+        ]
         assert local_storage_.mock_calls == [
-            call.get("last_fetched")
+            call.get("last_fetched"),
+            call.get("changed_files"),
         ]
         assert git_repo_.mock_calls == [
-            call.fetch(),
-            call.get_changed_files(branch_name, make_scenarios_path())
+            call.fetch(branch_name, mode="minimal"),
+            call.get_commits(branch_name),
+            call.get_changed_files(branch_name, make_scenarios_path(project_dir),
+                                   commits=("f6e5d4", "a1b2c3"))
         ]
         assert list(scheduler.scheduled) == [scenario1]
 
 
+@pytest.mark.usefixtures(git_changed_plugin.__name__)
+async def test_plugin_startup_no_scenarios(*, dispatcher: Dispatcher, project_dir: Path,
+                                           git_repo_: Mock, local_storage_: Mock):
+    with given:
+        await fire_arg_parsed_event(dispatcher, project_dir, changed_against_branch="main")
+
+        scheduler = ScenarioScheduler(scenarios=[])
+
+    with when:
+        await fire_startup_event(dispatcher, scheduler=scheduler)
+
+    with then:
+        assert local_storage_.mock_calls == []
+        assert git_repo_.mock_calls == []
+
+
+@pytest.mark.usefixtures(git_changed_plugin.__name__)
+async def test_plugin_cleanup_no_scenarios(*, dispatcher: Dispatcher, project_dir: Path,
+                                           local_storage_: Mock):
+    with given:
+        await fire_arg_parsed_event(dispatcher, project_dir, changed_against_branch="main")
+        await fire_startup_event(dispatcher, scheduler=ScenarioScheduler(scenarios=[]))
+
+    with when:
+        report = await fire_cleanup_event(dispatcher)
+
+    with then:
+        assert report.summary == []
+        assert local_storage_.mock_calls == []
+
+
 @pytest.mark.usefixtures(git_changed_plugin.__name__)
 async def test_plugin_startup_no_fetch(*, dispatcher: Dispatcher, project_dir: Path,
                                        git_repo_: Mock, local_storage_: Mock):
@@ -127,16 +307,63 @@ async def test_plugin_startup_no_fetch(*, dispatcher: Dispatcher, project_dir: P
         await fire_arg_parsed_event(dispatcher, project_dir,
                                     changed_against_branch=branch_name, changed_no_fetch=True)
 
+        scheduler = ScenarioScheduler(scenarios=[make_vscenario(project_dir, "scenario1.py")])
+
     with when:
-        await fire_startup_event(dispatcher)
+        await fire_startup_event(dispatcher, scheduler=scheduler)
 
     with then:
-        assert local_storage_.mock_calls == []
+        assert local_storage_.mock_calls == [
+            call.get("changed_files"),
+        ]
         assert git_repo_.mock_calls == [
-            call.get_changed_files(branch_name, make_scenarios_path())
+            call.get_commits(branch_name),
+            call.get_changed_files(branch_name, make_scenarios_path(project_dir),
+                                   commits=("f6e5d4", "a1b2c3"))
         ]
 
 
+@pytest.mark.usefixtures(git_changed_plugin.__name__)
+async def test_plugin_startup_first_fetch(*, dispatcher: Dispatcher, project_dir: Path,
+                                          git_repo_: Mock):
+    with given:
+        await fire_arg_parsed_event(dispatcher, project_dir,
+                                    changed_against_branch=(branch_name := "main"))
+
+        scheduler = ScenarioScheduler(scenarios=[make_vscenario(project_dir, "scenario1.py")])
+
+    with when, patch("time.time", return_value=12345) as time_:
+        await fire_startup_event(dispatcher, scheduler=scheduler)
+
+    with then:
+        assert git_repo_.fetch.mock_calls == [
+            call(branch_name, mode="minimal")
+        ]
+        assert time_.mock_calls == [call()]
+
+
+@pytest.mark.usefixtures(git_changed_plugin.__name__)
+async def test_plugin_startup_fetch_expired(*, dispatcher: Dispatcher, project_dir: Path,
+                                            git_repo_: Mock, local_storage_: Mock):
+    with given:
+        await fire_arg_parsed_event(dispatcher, project_dir,
+                                    changed_against_branch=(branch_name := "main"))
+
+        local_storage_.get.return_value = 12345 - 61
+        scheduler = ScenarioScheduler(scenarios=[make_vscenario(project_dir, "scenario1.py")])
+
+    with when, patch("time.time", return_value=12345) as time_:
+        await fire_startup_event(dispatcher, scheduler=scheduler)
+        await fire_cleanup_event(dispatcher)
+
+    with then:
+        assert git_repo_.fetch.mock_calls == [
+            call(branch_name, mode="minimal")
+        ]
+        assert time_.mock_calls == [call()]
+        assert call.put("last_fetched", 12345) in local_storage_.mock_calls
+
+
 @pytest.mark.usefixtures(git_changed_plugin.__name__)
 async def test_plugin_startup_no_fetch_cached(*, dispatcher: Dispatcher, project_dir: Path,
                                               git_repo_: Mock, local_storage_: Mock):
@@ -146,15 +373,283 @@ async def test_plugin_startup_no_fetch_cached(*, dispatcher: Dispatcher, project
 
         local_storage_.get.return_value = int(time())
 
+        scheduler = ScenarioScheduler(scenarios=[make_vscenario(project_dir, "scenario1.py")])
+
     with when:
-        await fire_startup_event(dispatcher)
+        await fire_startup_event(dispatcher, scheduler=scheduler)
 
     with then:
         assert local_storage_.mock_calls == [
-            call.get("last_fetched")
+            call.get("last_fetched"),
+            call.get("changed_files"),
+        ]
+        assert git_repo_.mock_calls == [
+            call.get_commits(branch_name),
+            call.get_changed_files(branch_name, make_scenarios_path(project_dir),
+                                   commits=("f6e5d4", "a1b2c3"))
+        ]
+
+
+@pytest.mark.usefixtures(git_changed_plugin.__name__)
+async def test_plugin_startup_changed_files_cached(*, dispatcher: Dispatcher, project_dir: Path,
+                                                   git_repo_: Mock):
+    with given:
+        await fire_arg_parsed_event(dispatcher, project_dir,
+                                    changed_against_branch=(branch_name := "main"),
+                                    changed_no_fetch=True)
+
+        scenario1 = make_vscenario(project_dir, "scenario1.py")
+        await fire_startup_event(dispatcher, scheduler=ScenarioScheduler(scenarios=[scenario1]))
+        git_repo_.reset_mock()
+
+    with when:
+        await fire_startup_event(dispatcher, scheduler=ScenarioScheduler(scenarios=[scenario1]))
+
+    with then:
+        assert git_repo_.mock_calls == [
+            call.get_commits(branch_name),
         ]
+
+
+@pytest.mark.usefixtures(git_changed_plugin.__name__)
+async def test_plugin_startup_changed_files_head_moved(*, dispatcher: Dispatcher,
+                                                       project_dir: Path, git_repo_: Mock):
+    with given:
+        await fire_arg_parsed_event(dispatcher, project_dir,
+                                    changed_against_branch=(branch_name := "main"),
+                                    changed_no_fetch=True)
+
+        scenario1 = make_vscenario(project_dir, "scenario1.py")
+        await fire_startup_event(dispatcher, scheduler=ScenarioScheduler(scenarios=[scenario1]))
+        git_repo_.reset_mock()
+
+        git_repo_.get_commits.return_value = ("f6e5d4", "d4e5f6")
+
+    with when:
+        await fire_startup_event(dispatcher, scheduler=ScenarioScheduler(scenarios=[scenario1]))
+
+    with then:
         assert git_repo_.mock_calls == [
-            call.get_changed_files(branch_name, make_scenarios_path())
+            call.get_commits(branch_name),
+            call.get_changed_files(branch_name, make_scenarios_path(project_dir),
+                                   commits=("f6e5d4", "d4e5f6")),
+        ]
+
+
+@pytest.mark.usefixtures(git_changed_plugin.__name__)
+async def test_plugin_startup_changed_files_stored(*, dispatcher: Dispatcher, project_dir: Path,
+                                                   git_repo_: Mock, local_storage_: Mock):
+    with given:
+        await fire_arg_parsed_event(dispatcher, project_dir,
+                                    changed_against_branch=(branch_name := "main"),
+                                    changed_no_fetch=True)
+
+        scenario1 = make_vscenario(project_dir, "scenario1.py")
+        scenario2 = make_vscenario(project_dir, "scenario2.py")
+        scheduler = ScenarioScheduler(scenarios=[scenario1, scenario2])
+
+        local_storage_.get.return_value = {
+            f"f6e5d4:a1b2c3:{make_scenarios_path(project_dir)}": [
+                str(make_scenarios_path(project_dir) / "scenario2.py")
+            ]
+        }
+
+    with when:
+        await fire_startup_event(dispatcher, scheduler=scheduler)
+
+    with then:
+        assert git_repo_.mock_calls == [
+            call.get_commits(branch_name),
+        ]
+        assert list(scheduler.scheduled) == [scenario2]
+
+
+@pytest.mark.usefixtures(git_changed_plugin.__name__)
+async def test_plugin_cleanup_changed_files_evicted(*, dispatcher: Dispatcher, project_dir: Path,
+                                                    local_storage_: Mock):
+    with given:
+        await fire_arg_parsed_event(dispatcher, project_dir,
+                                    changed_against_branch="main", changed_no_fetch=True)
+
+        stored = {f"{i}:{i}:{make_scenarios_path(project_dir)}": [] for i in range(16)}
+        local_storage_.get.return_value = dict(stored)
+
+        scheduler = ScenarioScheduler(scenarios=[make_vscenario(project_dir, "scenario1.py")])
+        await fire_startup_event(dispatcher, scheduler=scheduler)
+        local_storage_.reset_mock()
+
+    with when:
+        await fire_cleanup_event(dispatcher)
+
+    with then:
+        del stored[f"0:0:{make_scenarios_path(project_dir)}"]
+        stored[f"f6e5d4:a1b2c3:{make_scenarios_path(project_dir)}"] = []
+        assert local_storage_.mock_calls == [
+            call.put("changed_files", stored),
+            call.flush(),
+        ]
+        assert list(local_storage_.put.call_args.args[1]) == list(stored)
+
+
+@pytest.mark.usefixtures(git_changed_plugin.__name__)
+async def test_plugin_cleanup_changed_files_unchanged(*, dispatcher: Dispatcher,
+                                                      project_dir: Path, local_storage_: Mock):
+    with given:
+        await fire_arg_parsed_event(dispatcher, project_dir,
+                                    changed_against_branch="main", changed_no_fetch=True)
+
+        local_storage_.get.return_value = {
+            f"0:0:{make_scenarios_path(project_dir)}": [],
+            f"f6e5d4:a1b2c3:{make_scenarios_path(project_dir)}": [],
+        }
+
+        scheduler = ScenarioScheduler(scenarios=[make_vscenario(project_dir, "scenario1.py")])
+        await fire_startup_event(dispatcher, scheduler=scheduler)
+        local_storage_.reset_mock()
+
+    with when:
+        await fire_cleanup_event(dispatcher)
+
+    with then:
+        assert local_storage_.mock_calls == []
+
+
+@pytest.mark.usefixtures(git_changed_plugin.__name__)
+@pytest.mark.parametrize("entry", ["scenario1.py", None, 42, [42]])
+async def test_plugin_cleanup_changed_files_corrupted(entry: Any, *, dispatcher: Dispatcher,
+                                                      project_dir: Path, git_repo_: Mock,
+                                                      local_storage_: Mock):
+    with given:
+        await fire_arg_parsed_event(dispatcher, project_dir,
+                                    changed_against_branch=(branch_name := "main"),
+                                    changed_no_fetch=True)
+
+        local_storage_.get.return_value = {
+            f"f6e5d4:a1b2c3:{make_scenarios_path(project_dir)}": entry,
+            f"0:0:{make_scenarios_path(project_dir)}": [],
+        }
+        git_repo_.get_changed_files.return_value = frozenset({
+            str(make_scenarios_path(project_dir) / "scenario1.py")
+        })
+        scenario1 = make_vscenario(project_dir, "scenario1.py")
+        scenario2 = make_vscenario(project_dir, "scenario2.py")
+        scheduler = ScenarioScheduler(scenarios=[scenario1, scenario2])
+
+        await fire_startup_event(dispatcher, scheduler=scheduler)
+        local_storage_.reset_mock()
+
+    with when:
+        await fire_cleanup_event(dispatcher)
+
+    with then:
+        assert git_repo_.get_changed_files.mock_calls == [
+            call(branch_name, make_scenarios_path(project_dir), commits=("f6e5d4", "a1b2c3"))
+        ]
+        assert list(scheduler.scheduled) == [scenario1]
+        assert local_storage_.mock_calls == [
+            call.put("changed_files", {
+                f"0:0:{make_scenarios_path(project_dir)}": [],
+                f"f6e5d4:a1b2c3:{make_scenarios_path(project_dir)}": [
+                    str(make_scenarios_path(project_dir) / "scenario1.py")
+                ],
+            }),
+            call.flush(),
+        ]
+        assert list(local_storage_.put.call_args.args[1]) == [
+            f"0:0:{make_scenarios_path(project_dir)}",
+            f"f6e5d4:a1b2c3:{make_scenarios_path(project_dir)}",
+        ]
+
+
+@pytest.mark.usefixtures(git_changed_plugin.__name__)
+async def test_plugin_cleanup_changed_files_reordered(*, dispatcher: Dispatcher,
+                                                      project_dir: Path, git_repo_: Mock,
+                                                      local_storage_: Mock):
+    with given:
+        await fire_arg_parsed_event(dispatcher, project_dir,
+                                    changed_against_branch="main", changed_no_fetch=True)
+
+        local_storage_.get.return_value = {
+            f"f6e5d4:a1b2c3:{make_scenarios_path(project_dir)}": [],
+            f"0:0:{make_scenarios_path(project_dir)}": [],
+        }
+
+        scheduler = ScenarioScheduler(scenarios=[make_vscenario(project_dir, "scenario1.py")])
+        await fire_startup_event(dispatcher, scheduler=scheduler)
+        local_storage_.reset_mock()
+
+    with when:
+        await fire_cleanup_event(dispatcher)
+
+    with then:
+        assert local_storage_.mock_calls == [
+            call.put("changed_files", {
+                f"0:0:{make_scenarios_path(project_dir)}": [],
+                f"f6e5d4:a1b2c3:{make_scenarios_path(project_dir)}": [],
+            }),
+            call.flush(),
+        ]
+        assert list(local_storage_.put.call_args.args[1]) == [
+            f"0:0:{make_scenarios_path(project_dir)}",
+            f"f6e5d4:a1b2c3:{make_scenarios_path(project_dir)}",
+        ]
+        assert git_repo_.get_changed_files.mock_calls == []
+
+
+@pytest.mark.usefixtures(git_changed_plugin.__name__)
+async def test_plugin_startup_fetch_error(*, dispatcher: Dispatcher, project_dir: Path,
+                                          git_repo_: Mock):
+    with given:
+        await fire_arg_parsed_event(dispatcher, project_dir, changed_against_branch="main")
+
+        git_repo_.fetch.side_effect = GitRepoError("fetch")
+        scheduler = ScenarioScheduler(scenarios=[make_vscenario(project_dir, "scenario1.py")])
+
+    with when, raises(Exception) as exception:
+        await fire_startup_event(dispatcher, scheduler=scheduler)
+
+    with then:
+        assert exception.type is GitRepoError
+
+
+@pytest.mark.usefixtures(git_changed_plugin.__name__)
+async def test_plugin_startup_fetch_error_fetched_before(*, dispatcher: Dispatcher,
+                                                         project_dir: Path, git_repo_: Mock,
+                                                         local_storage_: Mock):
+    with given:
+        await fire_arg_parsed_event(dispatcher, project_dir,
+                                    changed_against_branch=(branch_name := "main"))
+
+        local_storage_.get.return_value = (last_fetched := 12345)
+        git_repo_.fetch.side_effect = GitRepoError("fetch")
+        git_repo_.get_changed_files.return_value = frozenset({
+            str(make_scenarios_path(project_dir) / "scenario1.py")
+        })
+        scenario1 = make_vscenario(project_dir, "scenario1.py")
+        scenario2 = make_vscenario(project_dir, "scenario2.py")
+        scheduler = ScenarioScheduler(scenarios=[scenario1, scenario2])
+
+        await fire_startup_event(dispatcher, scheduler=scheduler)
+        local_storage_.reset_mock()
+
+    with when:
+        report = await fire_cleanup_event(dispatcher)
+
+    with then:
+        at = datetime.fromtimestamp(last_fetched).strftime("%Y-%m-%d %H:%M:%S")
+        assert report.summary == [
+            f"Failed to fetch the '{branch_name}' branch, using the changes "
+            f"from the last fetch at {at}"
+        ]
+        assert list(scheduler.scheduled) == [scenario1]
+        assert local_storage_.mock_calls == [
+            call.put("last_fetched", last_fetched),
+            call.put("changed_files", {
+                f"f6e5d4:a1b2c3:{make_scenarios_path(project_dir)}": [
+                    str(make_scenarios_path(project_dir) / "scenario1.py")
+                ]
+            }),
+            call.flush(),
         ]
 
 
@@ -164,8 +659,9 @@ async def test_plugin_cleanup_no_changes(*, dispatcher: Dispatcher, project_dir:
     with given:
         await fire_arg_parsed_event(dispatcher, project_dir, changed_against_branch="main")
 
+        scheduler = ScenarioScheduler(scenarios=[make_vscenario(project_dir, "scenario1.py")])
         with patch("time.time", return_value=(now := 12345)):
-            await fire_startup_event(dispatcher)
+            await fire_startup_event(dispatcher, scheduler=scheduler)
 
         local_storage_.reset_mock()
         git_repo_.reset_mock()
@@ -180,7 +676,10 @@ async def test_plugin_cleanup_no_changes(*, dispatcher: Dispatcher, project_dir:
         ]
         assert local_storage_.mock_calls == [
             call.put("last_fetched", now),
-            call.flush()
+            call.put("changed_files", {
+                f"f6e5d4:a1b2c3:{make_scenarios_path(project_dir)}": []
+            }),
+            call.flush(),
         ]
         assert git_repo_.mock_calls == []
 
@@ -191,11 +690,12 @@ async def test_plugin_cleanup(*, dispatcher: Dispatcher, project_dir: Path,
     with given:
         await fire_arg_parsed_event(dispatcher, project_dir, changed_against_branch="main")
 
-        git_repo_.get_changed_files.return_value = [
-            make_scenarios_path() / "scenario1.py"
-        ]
+        git_repo_.get_changed_files.return_value = frozenset({
+            str(make_scenarios_path(project_dir) / "scenario1.py")
+        })
+        scheduler = ScenarioScheduler(scenarios=[make_vscenario(project_dir, "scenario1.py")])
         with patch("time.time", return_value=(now := 12345)):
-            await fire_startup_event(dispatcher)
+            await fire_startup_event(dispatcher, scheduler=scheduler)
 
         local_storage_.reset_mock()
         git_repo_.reset_mock()
@@ -207,6 +707,11 @@ async def test_plugin_cleanup(*, dispatcher: Dispatcher, project_dir: Path,
         assert report.summary == []
         assert local_storage_.mock_calls == [
             call.put("last_fetched", now),
-            call.flush()
+            call.put("changed_files", {
+                f"f6e5d4:a1b2c3:{make_scenarios_path(project_dir)}": [
+                    str(make_scenarios_path(project_dir) / "scenario1.py")
+                ]
+            }),
+            call.flush(),
         ]
         assert git_repo_.mock_calls == []
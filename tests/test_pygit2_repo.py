@@ -0,0 +1,214 @@
+from pathlib import Path
+from typing import List
+from unittest.mock import Mock
+
+import git
+import pytest
+from baby_steps import given, then, when
+from pytest import raises
+
+from vedro_git_changed import GitRepoError, Pygit2Repo
+
+pytest.importorskip("pygit2")
+
+
+def _commit(repo: git.Repo, files: List[str]) -> None:
+    for file in files:
+        path = Path(repo.working_dir) / file
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(file)
+    repo.index.add(files)
+    repo.index.commit("commit")
+
+
+@pytest.fixture()
+def repo(tmp_path: Path) -> git.Repo:
+    repo = git.Repo.init(tmp_path)
+    _commit(repo, ["scenarios/existing.py"])
+    repo.git.update_ref("refs/remotes/origin/main", "HEAD")
+    return repo
+
+
+def test_get_commits(repo: git.Repo):
+    with given:
+        _commit(repo, ["scenarios/login_as_user.py"])
+        git_repo = Pygit2Repo(Path(repo.working_dir))
+
+    with when:
+        commits = git_repo.get_commits("main")
+
+    with then:
+        assert commits == (repo.commit("origin/main").hexsha, repo.head.commit.hexsha)
+
+
+def test_get_changed_files(repo: git.Repo):
+    with given:
+        _commit(repo, [
+            ".gitignore",
+            "contexts/registered_user.py",
+            "scenarios/login_as_user.py",
+            "scenarios/register/register_via_email.py",
+        ])
+        project_dir = Path(repo.working_dir)
+        git_repo = Pygit2Repo(project_dir)
+
+    with when:
+        changed = git_repo.get_changed_files("main", project_dir / "scenarios")
+
+    with then:
+        assert isinstance(changed, frozenset)
+        assert changed == {
+            str(project_dir / "scenarios/login_as_user.py"),
+            str(project_dir / "scenarios/register/register_via_email.py"),
+        }
+
+
+def test_get_changed_files_after_commit(repo: git.Repo):
+    with given:
+        project_dir = Path(repo.working_dir)
+        git_repo = Pygit2Repo(project_dir)
+        git_repo.get_changed_files("main", project_dir / "scenarios")
+
+        _commit(repo, ["scenarios/login_as_user.py"])
+
+    with when:
+        changed = git_repo.get_changed_files("main", project_dir / "scenarios")
+
+    with then:
+        assert changed == {str(project_dir / "scenarios/login_as_user.py")}
+
+
+def test_get_changed_files_symlinked_project_dir(tmp_path: Path):
+    with given:
+        repo = git.Repo.init(tmp_path / "real")
+        _commit(repo, ["project/scenarios/existing.py"])
+        repo.git.update_ref("refs/remotes/origin/main", "HEAD")
+        _commit(repo, ["project/scenarios/login_as_user.py"])
+
+        (tmp_path / "link").symlink_to(tmp_path / "real")
+        project_dir = tmp_path / "link" / "project"
+        git_repo = Pygit2Repo(project_dir)
+
+    with when:
+        changed = git_repo.get_changed_files("main", project_dir / "scenarios")
+
+    with then:
+        assert changed == {str(project_dir / "scenarios/login_as_user.py")}
+
+
+def test_get_changed_files_symlink_in_repo(tmp_path: Path):
+    with given:
+        repo = git.Repo.init(tmp_path)
+        _commit(repo, ["real/scenarios/existing.py"])
+        repo.git.update_ref("refs/remotes/origin/main", "HEAD")
+        _commit(repo, ["real/scenarios/login_as_user.py"])
+
+        (tmp_path / "link").symlink_to(tmp_path / "real")
+        git_repo = Pygit2Repo(tmp_path)
+
+    with when:
+        changed = git_repo.get_changed_files("main", tmp_path / "link" / "scenarios")
+
+    with then:
+        assert changed == {str(tmp_path / "link/scenarios/login_as_user.py")}
+
+
+def test_get_changed_files_no_files(repo: git.Repo):
+    with given:
+        _commit(repo, ["contexts/registered_user.py"])
+        project_dir = Path(repo.working_dir)
+        git_repo = Pygit2Repo(project_dir)
+
+    with when:
+        changed = git_repo.get_changed_files("main", project_dir / "scenarios")
+
+    with then:
+        assert changed == set()
+
+
+def test_get_changed_files_error(repo: git.Repo):
+    with given:
+        project_dir = Path(repo.working_dir)
+        git_repo = Pygit2Repo(project_dir)
+
+    with when, raises(Exception) as exception:
+        git_repo.get_changed_files("unknown", project_dir / "scenarios")
+
+    with then:
+        assert exception.type is GitRepoError
+        assert str(exception.value) == (
+            "Failed to retrieve the file differences from the git repository "
+            "for the branch 'unknown'. Please ensure that the branch name is correct and exists."
+        )
+
+
+def test_get_changed_files_init_error(tmp_path: Path):
+    with given:
+        git_repo = Pygit2Repo(tmp_path)
+
+    with when, raises(Exception) as exception:
+        git_repo.get_changed_files("main", tmp_path / "scenarios")
+
+    with then:
+        assert exception.type is GitRepoError
+        assert str(exception.value) == (
+            f"Unable to find a git repository in '{tmp_path}' or any parent directories. "
+            "Ensure you are in a directory that is part of a valid git repository."
+        )
+
+
+def test_get_changed_files_without_git_repo(repo: git.Repo):
+    with given:
+        _commit(repo, ["scenarios/login_as_user.py"])
+        project_dir = Path(repo.working_dir)
+        git_repo_factory_ = Mock()
+        git_repo = Pygit2Repo(project_dir, git_repo_factory=git_repo_factory_)
+
+    with when:
+        changed = git_repo.get_changed_files("main", project_dir / "scenarios")
+
+    with then:
+        assert changed == {str(project_dir / "scenarios/login_as_user.py")}
+        assert git_repo_factory_.mock_calls == []
+
+
+def test_get_changed_files_no_merge_base(repo: git.Repo):
+    with given:
+        branch = repo.active_branch.name
+        repo.git.checkout("--orphan", "unrelated")
+        _commit(repo, ["scenarios/unrelated.py"])
+        repo.git.update_ref("refs/remotes/origin/main", "HEAD")
+        repo.git.checkout(branch)
+
+        project_dir = Path(repo.working_dir)
+        git_repo = Pygit2Repo(project_dir)
+
+    with when, raises(Exception) as exception:
+        git_repo.get_changed_files("main", project_dir / "scenarios")
+
+    with then:
+        assert exception.type is GitRepoError
+        assert str(exception.value) == (
+            "Failed to retrieve the file differences from the git repository "
+            "for the branch 'main'. Please ensure that the branch name is correct and exists."
+        )
+
+
+def test_get_changed_files_unborn_head(tmp_path: Path):
+    with given:
+        repo = git.Repo.init(tmp_path)
+        # origin/main points to a commit, while HEAD has none yet
+        commit = git.Commit.create_from_tree(repo, repo.index.write_tree(), "commit")
+        repo.git.update_ref("refs/remotes/origin/main", commit.hexsha)
+
+        git_repo = Pygit2Repo(tmp_path)
+
+    with when, raises(Exception) as exception:
+        git_repo.get_changed_files("main", tmp_path / "scenarios")
+
+    with then:
+        assert exception.type is GitRepoError
+        assert str(exception.value) == (
+            "Unable to resolve the HEAD commit of the git repository. "
+            "Please ensure that the current branch has at least one commit."
+        )
@@ -1,5 +1,7 @@
 from ._git_changed_plugin import VedroGitChanged, VedroGitChangedPlugin
 from ._git_repo import GitRepo, GitRepoError
+from ._pygit2_repo import Pygit2Repo
 
 __version__ = "0.2.0"
-__all__ = ("VedroGitChanged", "VedroGitChangedPlugin", "GitRepo", "GitRepoError",)
+__all__ = ("VedroGitChanged", "VedroGitChangedPlugin", "GitRepo", "GitRepoError",
+           "Pygit2Repo",)
@@ -1,9 +1,9 @@
+import os
 import time
 from datetime import datetime
 from pathlib import Path
-from typing import Callable, Type, Union
+from typing import Callable, Dict, FrozenSet, List, Optional, Type, Union
 
-from niltype import Nil, Nilable
 from vedro.core import Dispatcher, Plugin, PluginConfig
 from vedro.core.exp.local_storage import LocalStorageFactory, create_local_storage
 from vedro.events import (
@@ -14,24 +14,50 @@ from vedro.events import (
     StartupEvent,
 )
 
-from ._git_repo import GitRepo
+from ._git_repo import GitRepo, GitRepoError
+from ._pygit2_repo import Pygit2Repo
 
 __all__ = ("VedroGitChanged", "VedroGitChangedPlugin",)
 
 
+def _is_pygit2_installed() -> bool:
+    try:
+        import pygit2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _create_default_git_repo(path: Path, backend: str = "auto") -> GitRepo:
+    # pygit2 is an optional dependency, without it the diff is done by the git executable
+    if (backend == "pygit2") or (backend == "auto" and _is_pygit2_installed()):
+        return Pygit2Repo(path)
+    return GitRepo(path)
+
+
 class VedroGitChangedPlugin(Plugin):
     def __init__(self, config: Type["VedroGitChanged"], *,
-                 git_repo_factory: Callable[[], GitRepo] = GitRepo,
+                 git_repo_factory: Callable[[Path, str], GitRepo] = _create_default_git_repo,
                  local_storage_factory: LocalStorageFactory = create_local_storage) -> None:
         super().__init__(config)
         self._local_storage_factory = local_storage_factory
-        self._git_repo = git_repo_factory()
+        self._git_repo_factory = git_repo_factory
+        self._git_repo: Union[GitRepo, None] = None
         self._branch: Union[str, None] = None
         self._default_cache_duration: int = 60
         self._cache_duration: int = self._default_cache_duration
-        self._last_fetched: Nilable[int] = Nil
+        self._last_fetched: Optional[int] = None
         self._no_fetch: bool = False
+        self._default_fetch_mode: str = "minimal"
+        self._fetch_mode: str = self._default_fetch_mode
+        self._default_backend: str = "auto"
+        self._backend: str = self._default_backend
+        self._fetch_failed: bool = False
         self._no_changed: bool = False
+        self._max_stored_changed_files: int = 16
+        self._changed_files_cache: Dict[str, FrozenSet[str]] = {}
+        self._stored_changed_files: Optional[Dict[str, List[str]]] = None
+        self._stored_changed_files_updated: bool = False
 
     def subscribe(self, dispatcher: Dispatcher) -> None:
         dispatcher.listen(ConfigLoadedEvent, self.on_config_loaded) \
@@ -41,7 +67,9 @@ class VedroGitChangedPlugin(Plugin):
                   .listen(CleanupEvent, self.on_cleanup)
 
     def on_config_loaded(self, event: ConfigLoadedEvent) -> None:
-        self._local_storage = self._local_storage_factory(self, event.config.project_dir)
+        self._project_dir = event.config.project_dir
+        self._scenarios_dir = self._project_dir / "scenarios"
+        self._local_storage = self._local_storage_factory(self, self._project_dir)
 
     def on_arg_parse(self, event: ArgParseEvent) -> None:
         group = event.arg_parser.add_argument_group("Git Changed")
@@ -51,13 +79,26 @@ class VedroGitChangedPlugin(Plugin):
         group.add_argument("--changed-fetch-cache", type=int, default=self._default_cache_duration,
                            help=("Duration to cache the results of 'git fetch' "
                                  f"(default: {self._cache_duration} seconds)"))
+        group.add_argument("--changed-fetch-mode", choices=("minimal", "partial", "full"),
+                           default=self._default_fetch_mode,
+                           help=("What to fetch: only the compared branch ('minimal'), "
+                                 "the compared branch without file contents, turning the "
+                                 "repository into a partial clone ('partial'), or all remote "
+                                 f"branches and tags ('full') (default: {self._fetch_mode})"))
         group.add_argument("--changed-no-fetch", action="store_true",
                            help="Do not fetch the latest changes from the remote repository")
+        group.add_argument("--changed-backend", choices=("auto", "git", "pygit2"),
+                           default=self._default_backend,
+                           help=("How to compute the changed files: with the git executable "
+                                 "('git'), in-process with libgit2 ('pygit2'), or with pygit2 "
+                                 f"if it is installed ('auto') (default: {self._backend})"))
 
     def on_arg_parsed(self, event: ArgParsedEvent) -> None:
         self._branch = event.args.changed_against_branch
         self._cache_duration = event.args.changed_fetch_cache
         self._no_fetch = event.args.changed_no_fetch
+        self._fetch_mode = event.args.changed_fetch_mode
+        self._backend = event.args.changed_backend
 
         if self._cache_duration < 0:
             raise ValueError("Cache duration must be non-negative. "
@@ -67,47 +108,131 @@ class VedroGitChangedPlugin(Plugin):
             raise ValueError("The options '--changed-no-fetch' and '--changed-fetch-cache' "
                              "cannot be used together. Please choose one.")
 
+        if self._no_fetch and self._fetch_mode != self._default_fetch_mode:
+            raise ValueError("The options '--changed-no-fetch' and '--changed-fetch-mode' "
+                             "cannot be used together. Please choose one.")
+
+        if self._backend == "pygit2" and not _is_pygit2_installed():
+            raise ValueError("The 'pygit2' backend requires pygit2 to be installed. Please "
+                             "install 'vedro-git-changed[pygit2]' or choose another "
+                             "'--changed-backend'.")
+
     async def on_startup(self, event: StartupEvent) -> None:
         if self._branch is None:
             return
 
-        if not self._no_fetch:
-            self._last_fetched = await self._local_storage.get("last_fetched")
-            if self._should_fetch(self._last_fetched):
-                self._git_repo.fetch()
-                self._last_fetched = self._now()
+        if next(event.scheduler.scheduled, None) is None:
+            return
+
+        git_repo = self._get_git_repo()
 
-        target_directory = Path.cwd() / "scenarios/"
-        changed_files = self._git_repo.get_changed_files(self._branch, target_directory)
+        if not self._no_fetch:
+            now = self._now()
+            last_fetched = await self._local_storage.get("last_fetched")
+            # Local storage returns Nil for a missing key
+            self._last_fetched = last_fetched if isinstance(last_fetched, int) else None
+            if self._should_fetch(self._last_fetched, now):
+                try:
+                    git_repo.fetch(self._branch, mode=self._fetch_mode)
+                except GitRepoError:
+                    # Without any previous fetch there is nothing to compare against,
+                    # otherwise the refs from that fetch are still good enough (e.g. offline)
+                    if self._last_fetched is None:
+                        raise
+                    self._fetch_failed = True
+                else:
+                    self._last_fetched = now
+
+        changed_files = await self._get_changed_files(git_repo, self._branch,
+                                                      self._scenarios_dir)
         self._no_changed = len(changed_files) == 0
 
-        async for scenario in event.scheduler:
-            if self._no_changed or (scenario.path not in changed_files):
-                event.scheduler.ignore(scenario)
+        ignore = event.scheduler.ignore
+        if self._no_changed:
+            for scenario in list(event.scheduler.scheduled):
+                ignore(scenario)
+            return
+
+        scenarios = [scenario async for scenario in event.scheduler]
+        paths = [os.fspath(scenario.path) for scenario in scenarios]
+        for scenario, path in zip(scenarios, paths):
+            if path not in changed_files:
+                ignore(scenario)
 
     async def on_cleanup(self, event: CleanupEvent) -> None:
         if self._branch is None:
             return
 
+        if self._fetch_failed:
+            event.report.add_summary(self._create_fetch_failed_summary())
+
         if self._no_changed:
             event.report.add_summary(self._create_summary())
 
-        if self._last_fetched is not Nil:
+        if self._last_fetched is not None:
             await self._local_storage.put("last_fetched", self._last_fetched)
+
+        if self._stored_changed_files_updated:
+            await self._local_storage.put("changed_files", self._stored_changed_files)
+
+        if (self._last_fetched is not None) or self._stored_changed_files_updated:
             await self._local_storage.flush()
 
+    async def _get_changed_files(self, git_repo: GitRepo, branch: str,
+                                 target_directory: Path) -> FrozenSet[str]:
+        commits = git_repo.get_commits(branch)
+        cache_key = ":".join((*commits, os.fspath(target_directory)))
+        if cache_key in self._changed_files_cache:
+            return self._changed_files_cache[cache_key]
+
+        if self._stored_changed_files is None:
+            stored = await self._local_storage.get("changed_files")
+            self._stored_changed_files = stored if isinstance(stored, dict) else {}
+
+        stored_changed_files = self._stored_changed_files.get(cache_key)
+        # Local storage is a plain file that may hold anything, so an entry is only used
+        # if it is a list of paths, otherwise the diff is computed again
+        if not (isinstance(stored_changed_files, list)
+                and all(isinstance(path, str) for path in stored_changed_files)):
+            self._stored_changed_files.pop(cache_key, None)
+            stored_changed_files = sorted(git_repo.get_changed_files(branch, target_directory,
+                                                                     commits=commits))
+            self._stored_changed_files[cache_key] = stored_changed_files
+            while len(self._stored_changed_files) > self._max_stored_changed_files:
+                del self._stored_changed_files[next(iter(self._stored_changed_files))]
+            self._stored_changed_files_updated = True
+        elif next(reversed(self._stored_changed_files.keys())) != cache_key:
+            self._stored_changed_files[cache_key] = self._stored_changed_files.pop(cache_key)
+            self._stored_changed_files_updated = True
+
+        changed_files = frozenset(stored_changed_files)
+        self._changed_files_cache[cache_key] = changed_files
+        return changed_files
+
+    def _get_git_repo(self) -> GitRepo:
+        if self._git_repo is None:
+            self._git_repo = self._git_repo_factory(self._project_dir, self._backend)
+        return self._git_repo
+
     def _create_summary(self) -> str:
         summary = f"No scenarios have changed relative to the '{self._branch}' branch"
-        if self._last_fetched is not Nil:
-            at = datetime.fromtimestamp(self._last_fetched).strftime("%Y-%m-%d %H:%M:%S")
-            summary += f" since the last fetch at {at}"
+        if self._last_fetched is not None:
+            summary += f" since the last fetch at {self._format_time(self._last_fetched)}"
         return summary
 
+    def _create_fetch_failed_summary(self) -> str:
+        assert self._last_fetched is not None  # for type checker
+        return (f"Failed to fetch the '{self._branch}' branch, using the changes "
+                f"from the last fetch at {self._format_time(self._last_fetched)}")
+
+    def _format_time(self, timestamp: int) -> str:
+        return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
+
     def _now(self) -> int:
         return int(time.time())
 
-    def _should_fetch(self, last_fetched: Nilable[int]) -> bool:
-        return (last_fetched is Nil) or (self._now() - last_fetched > self._cache_duration)
+    def _should_fetch(self, last_fetched: Optional[int], now: int) -> bool:
+        return (last_fetched is None) or (now - last_fetched > self._cache_duration)
 
 
 class VedroGitChanged(PluginConfig):
@@ -1,14 +1,51 @@
-from functools import partial
+import os
+from functools import lru_cache, partial
 from pathlib import Path
-from typing import Callable, Set, Union
+from typing import IO, TYPE_CHECKING, Callable, FrozenSet, Iterator, Optional, Tuple, Union
 
-from git import PathLike, Repo
-from git.exc import GitCommandError, InvalidGitRepositoryError
+if TYPE_CHECKING:
+    from git import PathLike, Repo
 
 __all__ = ("GitRepo", "GitRepoError",)
 
 
-_create_git_repo = partial(Repo, search_parent_directories=True)
+# Using git diff-tree with --diff-filter=ACMT to select only files that are:
+# A - Added: Files that are new in the repository
+# C - Copied: Files that are copied from another file (with a recorded copy)
+# M - Modified: Files that have been changed
+# T - Type changed: Files that have had their type changed
+# diff-tree never detects renames unless -M is given (diff.renames does not apply to
+# plumbing), --no-renames only makes that explicit: a renamed file is reported as added
+# With -z paths are separated by NUL and printed verbatim, without the quoting
+# that git applies to unusual (e.g. non-ASCII) file names otherwise
+# For more details on the git diff-tree command and its options, see the Git documentation:
+# https://git-scm.com/docs/git-diff-tree
+_DIFF_OPTIONS = ("-r", "-z", "--name-only", "--diff-filter=ACMT", "--no-renames")
+
+
+def _read_nul_separated(stream: IO[bytes], chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    tail = b""
+    for chunk in iter(partial(stream.read, chunk_size), b""):
+        *entries, tail = (tail + chunk).split(b"\0")
+        yield from entries
+    if tail:
+        yield tail
+
+
+def _get_path_prefix(relative_target: Path) -> str:
+    # git reports paths relative to the repository root, always using forward slashes
+    return "".join(f"{part}/" for part in relative_target.parts)
+
+
+@lru_cache(maxsize=8)
+def _open_git_repo(path: str) -> "Repo":
+    from git import Repo
+
+    return Repo(path, search_parent_directories=True)
+
+
+def _create_git_repo(path: "PathLike") -> "Repo":
+    return _open_git_repo(os.fspath(path))
 
 
 class GitRepoError(Exception):
@@ -16,29 +53,58 @@ class GitRepoError(Exception):
 
 
 class GitRepo:
-    def __init__(self, *, git_repo_factory: Callable[[PathLike], Repo] = _create_git_repo) -> None:
+    def __init__(self, path: Path, *,
+                 git_repo_factory: Callable[["PathLike"], "Repo"] = _create_git_repo) -> None:
+        self._path = path
         self._git_repo_factory = git_repo_factory
-        self._git_repo: Union[Repo, None] = None
+        self._git_repo: Union["Repo", None] = None
+        self._working_dir: Union[Path, None] = None
 
     @property
-    def repo(self) -> Repo:
+    def repo(self) -> "Repo":
         if self._git_repo is None:
             self._git_repo = self._find_repo()
         return self._git_repo
 
-    def _find_repo(self) -> Repo:
+    def _find_repo(self) -> "Repo":
+        from git.exc import InvalidGitRepositoryError
+
         try:
-            return self._git_repo_factory(Path.cwd())
+            return self._git_repo_factory(self._path)
         except InvalidGitRepositoryError as e:
-            message = (
-                "Unable to find a git repository in the current or any parent directories. "
-                "Ensure you are in a directory that is part of a valid git repository."
-            )
-            raise GitRepoError(message) from e
+            raise self._repo_not_found_error() from e
+
+    def _get_working_dir(self) -> Path:
+        if self._working_dir is None:
+            # libgit2 resolves symlinks in the root while GitPython keeps it as given,
+            # so it is resolved here for both backends to compare against the same path
+            self._working_dir = self._resolve_working_dir().resolve()
+        return self._working_dir
 
-    def fetch(self) -> None:
+    def _resolve_working_dir(self) -> Path:
+        return Path(self.repo.working_dir)
+
+    def _get_relative_target(self, target_directory: Path) -> Optional[Path]:
         try:
-            self.repo.git.fetch()
+            return target_directory.resolve().relative_to(self._get_working_dir())
+        except ValueError:
+            # The target directory is outside the repository, so nothing in it can be changed
+            return None
+
+    def fetch(self, against_branch: str, *, mode: str = "minimal") -> None:
+        from git.exc import GitCommandError
+
+        if mode == "minimal":
+            args: Tuple[str, ...] = ("--no-tags", "origin", against_branch)
+        elif mode == "partial":
+            args = ("--no-tags", "--filter=blob:none", "origin", against_branch)
+        elif mode == "full":
+            args = ()
+        else:
+            raise ValueError(f"Unknown fetch mode '{mode}'")
+
+        try:
+            self.repo.git.fetch(*args)
         except GitCommandError as e:
             message = (
                 "An error occurred during 'git fetch'. This may be due to network issues, "
@@ -47,30 +113,67 @@ class GitRepo:
             )
             raise GitRepoError(message) from e
 
-    def get_changed_files(self, against_branch: str, target_directory: Path) -> Set[Path]:
+    def get_commits(self, against_branch: str) -> Tuple[str, str]:
+        return self._resolve_branch_commit(against_branch), self._resolve_head_commit()
+
+    def _resolve_head_commit(self) -> str:
         try:
-            # Using git diff with --diff-filter=ACMTR to select only files that are:
-            # A - Added: Files that are new in the repository
-            # C - Copied: Files that are copied from another file (with a recorded copy)
-            # M - Modified: Files that have been changed
-            # T - Type changed: Files that have had their type changed
-            # R - Renamed: Files that have been renamed
-            # For more details on the git diff command and its options, see the Git documentation:
-            # https://git-scm.com/docs/git-diff
-            diff = self.repo.git.diff("--name-only", "--diff-filter=ACMTR",
-                                      f"origin/{against_branch}...HEAD", "--", ".")
-        except GitCommandError as e:
-            message = (
-                "Failed to retrieve the file differences from the git repository for the branch "
-                f"'{against_branch}'. Please ensure that the branch name is correct and exists."
-            )
-            raise GitRepoError(message) from e
+            return self.repo.head.commit.hexsha
+        except ValueError as e:
+            raise self._head_error() from e
+
+    def _resolve_branch_commit(self, against_branch: str) -> str:
+        from git.exc import BadName
+
+        try:
+            return self.repo.commit(f"origin/{against_branch}").hexsha
+        except (BadName, ValueError) as e:
+            raise self._diff_error(against_branch) from e
 
-        git_path = Path(self.repo.working_dir)
+    def get_changed_files(self, against_branch: str, target_directory: Path, *,
+                          commits: Optional[Tuple[str, str]] = None) -> FrozenSet[str]:
+        from git.exc import GitCommandError
+
+        relative_target = self._get_relative_target(target_directory)
+        if relative_target is None:
+            return frozenset()
+
+        # Changed files are reported under the target directory as it was given (e.g. through
+        # a symlink), so they match scenario paths, which are not resolved either
+        target = os.fspath(target_directory)
+        prefix_length = len(_get_path_prefix(relative_target))
+        branch_commit, head_commit = commits or self.get_commits(against_branch)
+        try:
+            merge_base = self.repo.git.merge_base(branch_commit, head_commit)
+            proc = self.repo.git.diff_tree(*_DIFF_OPTIONS, merge_base, head_commit,
+                                           "--", relative_target.as_posix(), as_process=True)
+            changed_files = frozenset(
+                os.path.join(target, os.path.normpath(os.fsdecode(file)[prefix_length:]))
+                for file in _read_nul_separated(proc.stdout)
+            )
+            proc.wait()
+        except GitCommandError as e:
+            raise self._diff_error(against_branch) from e
 
-        changed_files = set()
-        for file in diff.splitlines():
-            path = git_path / file
-            if target_directory in path.parents:
-                changed_files.add(path)
         return changed_files
+
+    def _repo_not_found_error(self) -> GitRepoError:
+        message = (
+            f"Unable to find a git repository in '{self._path}' or any parent directories. "
+            "Ensure you are in a directory that is part of a valid git repository."
+        )
+        return GitRepoError(message)
+
+    def _head_error(self) -> GitRepoError:
+        message = (
+            "Unable to resolve the HEAD commit of the git repository. "
+            "Please ensure that the current branch has at least one commit."
+        )
+        return GitRepoError(message)
+
+    def _diff_error(self, against_branch: str) -> GitRepoError:
+        message = (
+            "Failed to retrieve the file differences from the git repository for the branch "
+            f"'{against_branch}'. Please ensure that the branch name is correct and exists."
+        )
+        return GitRepoError(message)
@@ -0,0 +1,107 @@
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, FrozenSet, Optional, Tuple, Union
+
+from ._git_repo import GitRepo, _create_git_repo, _get_path_prefix
+
+if TYPE_CHECKING:
+    import pygit2
+    from git import PathLike, Repo
+
+__all__ = ("Pygit2Repo",)
+
+
+@lru_cache(maxsize=8)
+def _open_pygit2_repo(path: str) -> "pygit2.Repository":
+    import pygit2
+
+    return pygit2.Repository(path)
+
+
+def _create_pygit2_repo(path: "PathLike") -> "pygit2.Repository":
+    return _open_pygit2_repo(os.fspath(path))
+
+
+# Computes the changed files in-process with libgit2 instead of spawning 'git diff-tree',
+# fetching is still done through GitPython
+class Pygit2Repo(GitRepo):
+    def __init__(self, path: Path, *,
+                 git_repo_factory: Callable[["PathLike"], "Repo"] = _create_git_repo,
+                 pygit2_repo_factory: Callable[["PathLike"], "pygit2.Repository"] = (
+                     _create_pygit2_repo
+                 )) -> None:
+        super().__init__(path, git_repo_factory=git_repo_factory)
+        self._pygit2_repo_factory = pygit2_repo_factory
+        self._pygit2_repo: Union["pygit2.Repository", None] = None
+
+    @property
+    def pygit2_repo(self) -> "pygit2.Repository":
+        if self._pygit2_repo is None:
+            self._pygit2_repo = self._find_pygit2_repo()
+        return self._pygit2_repo
+
+    def _find_pygit2_repo(self) -> "pygit2.Repository":
+        import pygit2
+
+        try:
+            return self._pygit2_repo_factory(self._path)
+        except pygit2.GitError as e:
+            raise self._repo_not_found_error() from e
+
+    def _resolve_working_dir(self) -> Path:
+        return Path(self.pygit2_repo.workdir)
+
+    def _resolve_head_commit(self) -> str:
+        import pygit2
+
+        try:
+            return str(self.pygit2_repo.head.target)
+        except (KeyError, pygit2.GitError) as e:
+            raise self._head_error() from e
+
+    def _resolve_branch_commit(self, against_branch: str) -> str:
+        import pygit2
+
+        try:
+            branch = self.pygit2_repo.revparse_single(f"origin/{against_branch}")
+            return str(branch.peel(pygit2.Commit).id)
+        except (KeyError, pygit2.GitError) as e:
+            raise self._diff_error(against_branch) from e
+
+    def get_changed_files(self, against_branch: str, target_directory: Path, *,
+                          commits: Optional[Tuple[str, str]] = None) -> FrozenSet[str]:
+        import pygit2
+        from pygit2.enums import DeltaStatus, DiffOption
+
+        repo = self.pygit2_repo
+        relative_target = self._get_relative_target(target_directory)
+        if relative_target is None:
+            return frozenset()
+        # libgit2 has no pathspec for tree-to-tree diffs, so files are matched by
+        # their repository-relative path
+        prefix = _get_path_prefix(relative_target)
+
+        branch_commit, head_commit = commits or self.get_commits(against_branch)
+        head = repo[head_commit].peel(pygit2.Commit)
+        merge_base = repo.merge_base(pygit2.Oid(hex=branch_commit), head.id)
+        if merge_base is None:
+            raise self._diff_error(against_branch)
+
+        # Same selection as the 'git diff-tree --diff-filter=ACMT --no-renames' used by GitRepo,
+        # libgit2 does not detect renames unless asked to
+        statuses = {
+            DeltaStatus.ADDED,
+            DeltaStatus.COPIED,
+            DeltaStatus.MODIFIED,
+            DeltaStatus.TYPECHANGE,
+        }
+        base_tree = repo[merge_base].peel(pygit2.Tree)
+        diff = base_tree.diff_to_tree(head.tree, flags=DiffOption.SKIP_BINARY_CHECK)
+
+        target = os.fspath(target_directory)
+        return frozenset(
+            os.path.join(target, os.path.normpath(delta.new_file.path[len(prefix):]))
+            for delta in diff.deltas
+            if (delta.status in statuses) and delta.new_file.path.startswith(prefix)
+        )